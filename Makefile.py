@@ -1,5 +1,5 @@
 import pipepy
-from pipepy import python, rm
+from pipepy import python, rm, run_parallel
 
 pipepy.set_always_stream(True)
 pipepy.set_always_raise(True)
@@ -58,8 +58,7 @@ def checks():
 
     from pipepy import black, flake8, isort
 
-    flake8()
-    isort(".", check_only=True)()
+    run_parallel(flake8, isort(".", check_only=True))
     black(".")
 
 
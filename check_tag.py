@@ -1,15 +1,14 @@
 import sys
+from importlib.metadata import version
 
-import pkg_resources
-
-from pipepy import git
+from pipepy import git, run_parallel
 
 if __name__ == "__main__":
     # Lets eat our own dogfood :)
-    git_tag = str(git.describe(tags=True)).strip()
+    git_tag, python_tag = run_parallel(
+        lambda: str(git.describe(tags=True)).strip(), lambda: version("pipepy")
+    )
     print(f"git tag    is: {git_tag}")
-
-    python_tag = pkg_resources.require("pipepy")[0].version
     print(f"python tag is: {python_tag}")
 
     if git_tag == python_tag:
@@ -1,8 +1,10 @@
 from subprocess import TimeoutExpired  # noqa: F401
 
+from . import misc
 from .exceptions import PipePyError  # noqa: F401
-from .misc import *  # noqa: F401 F403
+from .misc import cd, export, overload_chars, run_parallel, source  # noqa: F401
 from .pipepy import (  # noqa: F401
+    PersistentPipePy,
     PipePy,
     jobs,
     set_always_raise,
@@ -10,3 +12,24 @@ from .pipepy import (  # noqa: F401
     set_interactive,
     wait_jobs,
 )
+
+__all__ = [
+    "PipePy",
+    "PipePyError",
+    "PersistentPipePy",
+    "TimeoutExpired",
+    "jobs",
+    "set_always_raise",
+    "set_always_stream",
+    "set_interactive",
+    "wait_jobs",
+] + misc.__all__
+
+
+def __getattr__(name):
+    # Commands in PATH are resolved lazily by `misc`
+    return getattr(misc, name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(dir(misc)))
@@ -1,10 +1,20 @@
+import atexit as _atexit
 import os
 import pathlib
 import re
+import shlex as _shlex
+import shutil
 import stat as stat_  # aliasing because there's a 'stat' UNIX command
 import string
+import subprocess as _subprocess
+import threading as _threading
 
-from .pipepy import PipePy
+from .exceptions import PipePyError
+from .pipepy import PipePy, _register_executables
+
+_DECLARE_RE = re.compile(r'^[ \t]*declare -x ([^=]+)="(.*)"[ \t]*$', re.MULTILINE)
+
+_ASCII_LETTER_MAP = {char: char for char in string.ascii_letters}
 
 
 def overload_chars(locals_):
@@ -19,23 +29,166 @@ def overload_chars(locals_):
         ... -rw-r--r-- 1 kbairak kbairak 8923 Feb  3 23:06 bar.txt
     """
 
-    for char in string.ascii_letters:
-        if char in locals_:
-            continue
-        locals_[char] = char
+    for key, value in _ASCII_LETTER_MAP.items():
+        locals_.setdefault(key, value)
+
+
+def _cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "pipepy")
+
+
+def _read_cache(cache_filename):
+    import json
+
+    try:
+        with open(cache_filename) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 
-for path in os.get_exec_path():
+def _write_cache(cache_filename, data):
+    import json
+
+    # Caches are best-effort, failing to write them should not break anything
     try:
-        listdir = os.listdir(path)
-    except FileNotFoundError:
-        continue
-    for original_name in listdir:
-        name = original_name.replace("-", "_")
-        if name in locals():
+        os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+        tmp_filename = f"{cache_filename}.{os.getpid()}.tmp"
+        fd = os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_filename, cache_filename)
+    except OSError:
+        pass
+
+
+def _list_executables(path):
+    """Return the names of the executable files in the `path` directory."""
+
+    result = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                mode = entry.stat(follow_symlinks=False).st_mode
+            except OSError:
+                continue
+            if mode & (stat_.S_IXUSR | stat_.S_IXGRP | stat_.S_IXOTH):
+                result.append(entry.name)
+    return result
+
+
+def _is_valid_cache_entry(entry):
+    """The cache file is user-writable, make sure an entry has the
+    `[mtime, names]` shape before using it.
+    """
+
+    return (
+        isinstance(entry, list)
+        and len(entry) == 2
+        and isinstance(entry[0], int)
+        and isinstance(entry[1], list)
+        and all(isinstance(name, str) for name in entry[1])
+    )
+
+
+def _scan_path(use_cache=True):
+    """Find the executables in PATH. Return a dict that maps python-friendly
+    names to the executables' names and a dict that maps the executables'
+    names to their absolute paths. The first directory in PATH wins, like in
+    a shell.
+
+    The contents of each directory are cached in
+    `$XDG_CACHE_HOME/pipepy/commands.json` and reused for as long as the
+    directory's modification time stays the same, so that only the
+    directories themselves need to be checked on subsequent imports.
+    """
+
+    cache_filename = os.path.join(_cache_dir(), "commands.json")
+    cache = _read_cache(cache_filename) if use_cache else None
+    if not isinstance(cache, dict):
+        cache = {}
+    new_cache = {}
+
+    available, paths = {}, {}
+    for path in os.get_exec_path():
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            entry = cache.get(path)
+            if _is_valid_cache_entry(entry) and entry[0] == mtime:
+                names = entry[1]
+            else:
+                names = _list_executables(path)
+        except OSError:
             continue
-        if "x" in stat_.filemode(os.lstat(os.path.join(path, original_name)).st_mode):
-            locals()[name] = PipePy(original_name)
+
+        if os.path.isabs(path):
+            new_cache[path] = [mtime, names]
+        for original_name in names:
+            name = original_name.replace("-", "_")
+            if name in available:
+                continue
+            available[name] = original_name
+            if os.path.isabs(path):
+                paths[original_name] = os.path.join(path, original_name)
+
+    if use_cache and new_cache != cache:
+        _write_cache(cache_filename, new_cache)
+    return available, paths
+
+
+# The PipePy objects for the executables in PATH are only created when first
+# accessed (see `__getattr__` below). Setting `PIPEPY_NO_PATH_SCAN=1` skips
+# the scan altogether; commands are then looked up in PATH one by one, on
+# demand. Setting `PIPEPY_NO_COMMAND_CACHE=1` disables the cache of the scan
+_SCAN_PATH = os.environ.get("PIPEPY_NO_PATH_SCAN") != "1"
+if _SCAN_PATH:
+    _AVAILABLE, _PATHS = _scan_path(
+        use_cache=os.environ.get("PIPEPY_NO_COMMAND_CACHE") != "1"
+    )
+else:
+    _AVAILABLE, _PATHS = {}, {}
+_register_executables(_PATHS)
+
+
+def _resolve_command_name(name):
+    """Return the name of the executable that the python-friendly `name`
+    refers to, eg 'apt-get' for 'apt_get', or `None` if there isn't one.
+    """
+
+    if name in _AVAILABLE:
+        return _AVAILABLE[name]
+    if name.startswith("__"):
+        return None
+    # Not found by the scan, or the scan was skipped. The cached scan can also
+    # miss executables, eg files made executable with `chmod +x` since, which
+    # doesn't change the modification time of their directory
+    for original_name in (name, name.replace("_", "-")):
+        if shutil.which(original_name) is not None:
+            return original_name
+    return None
+
+
+def __getattr__(name):
+    """Create PipePy objects for executables in PATH on first access and
+    cache them as module attributes:
+
+        >>> from pipepy import ls
+        >>> ls
+        <<< PipePy('ls')
+    """
+
+    original_name = _resolve_command_name(name)
+    if original_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    result = globals()[name] = PipePy(original_name)
+    return result
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_AVAILABLE))
 
 
 class cd:
@@ -126,7 +279,9 @@ class export:
     """
 
     def __init__(self, **kwargs):
-        self._previous_env = dict(os.environ)
+        # Only remember the variables we are about to change; `None` means
+        # the variable was not set
+        self._previous_env = {key: os.environ.get(key) for key in kwargs}
         self._kwargs = kwargs
 
         os.environ.update(kwargs)
@@ -139,7 +294,7 @@ class export:
             if os.environ[key] != value:
                 # Variable changed within the body of the `with` block, skip
                 pass
-            elif key in self._previous_env:
+            elif self._previous_env[key] is not None:
                 # Value was changed by the `with` statement, restore
                 os.environ[key] = self._previous_env[key]
             else:
@@ -147,7 +302,153 @@ class export:
                 del os.environ[key]
 
 
-def source(filename, *, recursive=False, quiet=True, shell="bash"):
+def _is_regular_file(path):
+    """Like `path.exists() and path.is_file()`, with a single `stat` call."""
+
+    try:
+        return stat_.S_ISREG(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _is_valid_cached_env(env):
+    """The cache files are user-writable, make sure one holds a mapping of
+    environment variables before using it.
+    """
+
+    return isinstance(env, dict) and all(
+        isinstance(key, str) and isinstance(value, str) for key, value in env.items()
+    )
+
+
+def _source_cache_filename(filename, shell):
+    """Return the path of the file that caches the result of sourcing
+    `filename` with `shell`. The cache is invalidated when the file is
+    modified or when the current environment changes, since the sourced
+    script may depend on it.
+    """
+
+    import hashlib
+
+    parts = [filename, str(os.stat(filename).st_mtime_ns), shell]
+    parts.extend(f"{key}={value}" for key, value in sorted(os.environ.items()))
+    digest = hashlib.sha256(
+        b"\0".join(part.encode("utf-8", "surrogateescape") for part in parts)
+    ).hexdigest()
+    return os.path.join(_cache_dir(), "source", f"{digest}.json")
+
+
+class _ShellCoprocess:
+    """A long-lived shell process that `source` sends its commands to, so
+    that a new shell doesn't have to be started for every sourced file.
+
+    Each file is sourced in a subshell so that files sourced one after the
+    other don't affect each other. Since the current directory and the
+    environment are inherited when the shell starts, it will be restarted
+    if either of them has changed since.
+    """
+
+    def __init__(self, shell):
+        import uuid
+
+        self._shell = shell
+        self._lock = _threading.Lock()
+        self._sentinel = f"__pipepy_{uuid.uuid4().hex}__"
+        self._process = None
+        self._cwd = None
+        self._env = None
+        self._stderr_filename = None
+
+    def _start(self):
+        import tempfile
+
+        self.close()
+        self._cwd = os.getcwd()
+        self._env = dict(os.environ)
+        fd, self._stderr_filename = tempfile.mkstemp(prefix="pipepy-source-")
+        os.close(fd)
+        self._process = _subprocess.Popen(
+            [self._shell],
+            stdin=_subprocess.PIPE,
+            stdout=_subprocess.PIPE,
+            stderr=_subprocess.DEVNULL,
+            text=True,
+        )
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+        if self._stderr_filename is not None:
+            try:
+                os.remove(self._stderr_filename)
+            except OSError:
+                pass
+            self._stderr_filename = None
+
+    def source(self, filename):
+        """Source `filename` and return a `(returncode, stdout, stderr)`
+        tuple, `stdout` being the output of `declare -x`.
+        """
+
+        with self._lock:
+            if (
+                self._process is None
+                or self._process.poll() is not None
+                or self._cwd != os.getcwd()
+                or self._env != dict(os.environ)
+            ):
+                self._start()
+
+            # If the exchange is interrupted, the shell's reply would be
+            # read as the start of the next one's, so start over instead
+            try:
+                self._process.stdin.write(
+                    f"( source {_shlex.quote(filename)} && declare -x ) "
+                    f"</dev/null 2>{_shlex.quote(self._stderr_filename)}\n"
+                    f"printf '\\n%s %s\\n' {self._sentinel} $?\n"
+                )
+                self._process.stdin.flush()
+
+                lines = []
+                for line in self._process.stdout:
+                    if line.startswith(self._sentinel):
+                        returncode = int(line.split()[1])
+                        break
+                    lines.append(line)
+                else:
+                    raise RuntimeError(f"Shell {self._shell!r} exited unexpectedly")
+            except BaseException:
+                self._process.kill()
+                self.close()
+                raise
+
+            # Strip the newline that `printf` added before the sentinel
+            stdout = "".join(lines)[:-1]
+            if returncode == 0:
+                stderr = ""
+            else:
+                with open(self._stderr_filename) as f:
+                    stderr = f.read()
+            return returncode, stdout, stderr
+
+
+_SHELL_COPROCESSES = {}
+
+
+def _get_shell_coprocess(shell):
+    return _SHELL_COPROCESSES.setdefault(shell, _ShellCoprocess(shell))
+
+
+@_atexit.register
+def _close_shell_coprocesses():
+    for coprocess in _SHELL_COPROCESSES.values():
+        coprocess.close()
+
+
+def source(filename, *, recursive=False, quiet=True, shell="bash", cache=False):
     """Source a bash script and export any environment variables defined
     there.
 
@@ -155,6 +456,9 @@ def source(filename, *, recursive=False, quiet=True, shell="bash"):
     - recursive: Whether to go through all the parent directories to find
           similarly named bash scripts, defaults to `False`
     - shell: which shell to use for sourcing, defaults to 'bash'
+    - cache: Whether to store the resulting environment variables under
+          `$XDG_CACHE_HOME/pipepy/source` and reuse them while the files and
+          the current environment stay the same, defaults to `False`
 
     Can also be used as a context processor for temporary environment
     changes, like `export` (in fact, it uses `export` internally).
@@ -198,30 +502,73 @@ def source(filename, *, recursive=False, quiet=True, shell="bash"):
 
     ptr = pathlib.Path(".").resolve()
     filenames = []
-    if (ptr / filename).exists() and (ptr / filename).is_file():
-        filenames.append(str((ptr / filename).resolve()))
-    if recursive:
-        while True:
-            ptr = ptr.parent
-            if (ptr / filename).exists() and (ptr / filename).is_file():
-                filenames.append(str((ptr / filename).resolve()))
-            if ptr == ptr.parent:
-                break
+    while True:
+        candidate = ptr / filename
+        if _is_regular_file(candidate):
+            filenames.append(str(candidate.resolve()))
+        if not recursive or ptr == ptr.parent:
+            break
+        ptr = ptr.parent
 
     env = {}
-    shell_cmd = globals()[shell](_stream=False)
+    shell_coprocess = _get_shell_coprocess(shell)
     for filename in reversed(filenames):
-        result = f"source {filename} && declare -x" | shell_cmd
-        if not result:
+        if cache:
+            cache_filename = _source_cache_filename(filename, shell)
+            file_env = _read_cache(cache_filename)
+            if _is_valid_cached_env(file_env):
+                env.update(file_env)
+                continue
+
+        returncode, stdout, stderr = shell_coprocess.source(filename)
+        if returncode != 0:
             if quiet:
                 continue
             else:
-                result.raise_for_returncode()
-        for line in result:
-            match = re.search(r'^declare -x ([^=]+)="(.*)"$', line.strip())
-            if not match:
-                continue
+                raise PipePyError(returncode, stdout, stderr)
+        file_env = {}
+        for match in _DECLARE_RE.finditer(stdout):
             key, value = match.groups()
             if key not in os.environ or value != os.environ[key]:
-                env[key] = value
+                file_env[key] = value
+        env.update(file_env)
+
+        if cache:
+            _write_cache(cache_filename, file_env)
     return export(**env)
+
+
+def run_parallel(*callables):
+    """Run the callables concurrently, each in its own thread, and return
+    their results in order. Since invoking a command mostly means waiting
+    for a subprocess to finish, threads are enough to have independent
+    commands run side by side.
+
+    If any of the callables raises an exception, it will be re-raised after
+    all of them have finished.
+
+        >>> from pipepy import run_parallel, sleep
+
+        >>> run_parallel(sleep(2), sleep(3))  # Will take 3 seconds, not 5
+        <<< [PipePy('sleep', '2', _returncode=0),
+        ...  PipePy('sleep', '3', _returncode=0)]
+    """
+
+    if not callables:
+        return []
+
+    # Deferred, it is slow to import and only needed here
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=len(callables)) as executor:
+        futures = [executor.submit(func) for func in callables]
+    return [future.result() for future in futures]
+
+
+# `from pipepy import *` should bring in every command, like it did when they
+# were all created on import. Listing them here makes the star import go
+# through `__getattr__` for each one
+_HELPERS = ["cd", "export", "overload_chars", "run_parallel", "source"]
+__all__ = _HELPERS + sorted(
+    name for name in _AVAILABLE if not name.startswith("_") and name not in _HELPERS
+)
@@ -1,15 +1,21 @@
-import inspect
+import atexit
+import codecs
 import io
+import os
 import pathlib
+import re
 import reprlib
+import shutil
+import subprocess
+import threading
 import types
+import weakref
 from collections.abc import Iterable
 from copy import copy
-from glob import glob
-from subprocess import PIPE, Popen, TimeoutExpired
+from subprocess import DEVNULL, PIPE, Popen, TimeoutExpired
 
 from .exceptions import PipePyError
-from .utils import _File
+from .utils import _File, _iter_lines
 
 ALWAYS_RAISE = False
 ALWAYS_STREAM = False
@@ -17,6 +23,44 @@ INTERACTIVE = False
 
 _JOBS = {}
 
+# Processes started by `PipePy.persistent()`, by command and text mode. Only
+# the most recently used ones are kept, so that eg `grep(x).persistent()` in a
+# loop doesn't leave a process running for every `x`
+_PERSISTENT = {}
+_PERSISTENT_MAX_SIZE = 16
+_PERSISTENT_LOCK = threading.Lock()
+# Every `PersistentPipePy`, including evicted ones that are still in use, so
+# that they can be closed on exit
+_PERSISTENT_ALL = weakref.WeakSet()
+
+# Results of `_pipe_function_keys`. The keys are weak references, so that
+# functions, and whatever their closures or bound instances refer to, are not
+# kept alive by the cache
+_PIPE_FUNCTION_KEYS = weakref.WeakKeyDictionary()
+
+# Default capacity of a pipe on Linux
+_PIPE_BUFFER_SIZE = 64 * 1024
+
+# Whether `subprocess` may use `os.posix_spawn`, see `_popen`
+_USE_POSIX_SPAWN = getattr(subprocess, "_USE_POSIX_SPAWN", False)
+
+# Same test `glob.has_magic` performs; arguments without these characters
+# can't match anything but themselves, so there is no need to hit the
+# filesystem for them
+_GLOB_MAGIC_RE = re.compile(r"[*?[]")
+
+# Conservative threshold for input that can never fill up a pipe, so it can be
+# written without a thread: even with every character encoded with 4 bytes,
+# it only takes up a small fraction of the pipe's capacity
+_SMALL_INPUT_SIZE = _PIPE_BUFFER_SIZE // 64
+
+# Absolute paths of executables (or `None` if not found), as found by
+# scanning PATH when `pipepy.misc` was imported or by looking them up when
+# first run. They are only used while PATH is still the same as it was when
+# they were found
+_EXECUTABLES = {}
+_EXECUTABLES_PATH = None
+
 
 def jobs():
     return list(_JOBS.values())
@@ -42,6 +86,125 @@ def set_interactive(value):
     INTERACTIVE = value
 
 
+def _register_executables(executables):
+    global _EXECUTABLES, _EXECUTABLES_PATH
+    _EXECUTABLES = executables
+    _EXECUTABLES_PATH = os.environ.get("PATH")
+
+
+def _find_executable(name):
+    """Return the absolute path of the `name` executable, looking it up in
+    PATH only the first time, or `None` if it can't be determined.
+    """
+
+    global _EXECUTABLES, _EXECUTABLES_PATH
+
+    path = os.environ.get("PATH")
+    if path != _EXECUTABLES_PATH:
+        _EXECUTABLES, _EXECUTABLES_PATH = {}, path
+    if os.sep in name:
+        return None
+    try:
+        return _EXECUTABLES[name]
+    except KeyError:
+        pass
+    executable = shutil.which(name)
+    if executable is not None and not os.path.isabs(executable):
+        # Relative directory in PATH, depends on the current directory
+        executable = None
+    _EXECUTABLES[name] = executable
+    return executable
+
+
+def _popen(args, **kwargs):
+    """Like `Popen`, but skip searching PATH for the executable if we already
+    know where it is.
+
+    Where `subprocess` can start processes with `os.posix_spawn` instead of
+    fork+exec, we pass `close_fds=False`, which it requires along with the
+    executable's absolute path. File descriptors opened by Python are not
+    inheritable (PEP 446), so only ones explicitly made inheritable, eg with
+    `os.set_inheritable`, are passed on to the child. Elsewhere, `Popen`'s
+    default of closing them is kept.
+
+    Python ignores SIGPIPE, and children would inherit that. We make sure
+    it's restored to the default action so that, in a pipe like
+    `yes | head('-1')`, the left command is terminated once the right one
+    exits, like it would in a shell.
+
+    The pipes' buffers are sized like the pipes themselves, instead of the
+    default 8KB, so that reading large outputs takes fewer system calls.
+    """
+
+    if _USE_POSIX_SPAWN:
+        kwargs.setdefault("close_fds", False)
+    kwargs.setdefault("restore_signals", True)
+    if kwargs.get("bufsize") is None:
+        kwargs["bufsize"] = _PIPE_BUFFER_SIZE
+
+    executable = _find_executable(args[0])
+    if executable is not None:
+        try:
+            return Popen(args, executable=executable, **kwargs)
+        except (FileNotFoundError, PermissionError):
+            # The executable was removed or replaced since we found it
+            _EXECUTABLES.pop(args[0], None)
+    return Popen(args, **kwargs)
+
+
+def _pipe_function_keys(func):
+    """Return the names of `func`'s arguments, or `None` if it can't be
+    piped to. Functions used in pipes are usually reused, eg in loops, so
+    their signatures are only inspected once.
+    """
+
+    try:
+        return _PIPE_FUNCTION_KEYS[func]
+    except (KeyError, TypeError):
+        # Not seen before, or can't be weakly referenced (eg builtins)
+        pass
+
+    import inspect  # Deferred, it is slow to import and rarely needed
+
+    parameters = inspect.signature(func).parameters
+    if not parameters or not all(
+        (
+            value.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD
+            for value in parameters.values()
+        )
+    ):
+        keys = None
+    else:
+        keys = frozenset(parameters.keys())
+
+    try:
+        _PIPE_FUNCTION_KEYS[func] = keys
+    except TypeError:
+        pass
+    return keys
+
+
+def _iter_blocks(output):
+    """Split `str` or `bytes` output into pipe-sized blocks."""
+
+    for start in range(0, len(output), _PIPE_BUFFER_SIZE):
+        end = start + _PIPE_BUFFER_SIZE
+        yield output[start:end]
+
+
+def _copy_input(input_):
+    """Copy the `_input` of a command for a derived command. Strings, files
+    and iterators (which can't be copied, eg generators) are shared, while
+    PipePy objects and mutable collections are copied.
+    """
+
+    if input_ is None or isinstance(input_, (str, bytes, _File)):
+        return input_
+    if isinstance(input_, Iterable) and iter(input_) is input_:
+        return input_
+    return copy(input_)
+
+
 # Forward calls to background process
 def _map_to_background_process(method):
     """Expose the `send_signal`, `terminate` and `kill` methods of Popen
@@ -57,6 +220,30 @@ def _map_to_background_process(method):
 
 
 class PipePy:
+    # A new instance is created for every call, attribute access or pipe,
+    # so avoid giving each one its own `__dict__`
+    __slots__ = (
+        "_args",
+        "_lazy",
+        "_input",
+        "_stream_stdout",
+        "_stream_stderr",
+        "_stream",
+        "_text",
+        "_encoding",
+        "_raise",
+        "_bufsize",
+        "_process",
+        "_input_consumed",
+        "_feeder",
+        "_feeder_error",
+        "_stdout_piped",
+        "_returncode",
+        "_stdout",
+        "_stderr",
+        "_decoded_stdout",
+    )
+
     # Init and copies
     def __init__(
         self,
@@ -69,6 +256,7 @@ class PipePy:
         _text=True,
         _encoding="UTF-8",
         _raise=None,
+        _bufsize=None,
         **kwargs,
     ):
         """Initialize a PipePy object.
@@ -105,6 +293,10 @@ class PipePy:
             exception by calling `command.raise_for_returncode()` (similar
             to `request`'s `response.raise_for_status()`)
 
+        - _bufsize: The buffer size of the pipes connected to the process's
+            stdin, stdout and stderr, passed on to `subprocess.Popen`. If not
+            set, the size of a pipe on Linux (64KB) will be used
+
         The ones that are set by functions or operators are:
 
         - _lazy: Whether this instance will be evaluated again after having
@@ -131,13 +323,18 @@ class PipePy:
         self._text = _text
         self._encoding = _encoding
         self._raise = _raise
+        self._bufsize = _bufsize
 
         self._process = None
         self._input_consumed = False
+        self._feeder = None
+        self._feeder_error = None
+        self._stdout_piped = False
 
         self._returncode = None
         self._stdout = None
         self._stderr = None
+        self._decoded_stdout = None
 
     def __call__(
         self,
@@ -149,6 +346,7 @@ class PipePy:
         _text=None,
         _encoding=None,
         _raise=None,
+        _bufsize=None,
         **kwargs,
     ):
         """Make and return a copy of `self`, overriding some of its
@@ -171,10 +369,10 @@ class PipePy:
             and _text is None
             and _encoding is None
             and _raise is None
+            and _bufsize is None
             and not kwargs
         )
 
-        args = self._args + list(args)
         if _input is None:
             _input = self._input
         if _stream_stdout is None:
@@ -189,6 +387,8 @@ class PipePy:
             _encoding = self._encoding
         if _raise is None:
             _raise = self._raise
+        if _bufsize is None:
+            _bufsize = self._bufsize
 
         result = self.__class__(
             *args,
@@ -200,8 +400,12 @@ class PipePy:
             _text=_text,
             _encoding=_encoding,
             _raise=_raise,
+            _bufsize=_bufsize,
             **kwargs,
         )
+        # `self._args` have already been converted (and globbed); only the
+        # new arguments need to go through `_convert_args`
+        result._args = self._args + result._args
         if force:
             result._evaluate()
         return result
@@ -237,29 +441,34 @@ class PipePy:
             >>> git('status')
         """
 
-        return self.__class__(
-            *(self._args + [attr]),
+        result = self.__class__(
+            attr,
             _lazy=self._lazy,
-            _input=copy(self._input),
+            _input=_copy_input(self._input),
             _stream_stdout=self._stream_stdout,
             _stream_stderr=self._stream_stderr,
             _stream=self._stream,
             _text=self._text,
             _encoding=self._encoding,
             _raise=self._raise,
+            _bufsize=self._bufsize,
         )
+        result._args = self._args + result._args
+        return result
 
     def __copy__(self):
-        return self.__class__(
-            *self._args,
+        result = self.__class__(
             _lazy=True,
-            _input=copy(self._input),
+            _input=_copy_input(self._input),
             _stream_stdout=self._stream_stdout,
             _stream_stderr=self._stderr,
             _stream=self._stream,
             _text=self._text,
             _encoding=self._encoding,
+            _bufsize=self._bufsize,
         )
+        result._args = list(self._args)
+        return result
 
     @staticmethod
     def _convert_args(args, kwargs):
@@ -292,27 +501,36 @@ class PipePy:
         """
 
         final_args = []
+        # Bound once, the loops below run for every argument of every command
+        append, extend = final_args.append, final_args.extend
+        has_magic = _GLOB_MAGIC_RE.search
         for arg in args:
-            arg = str(arg)
+            if type(arg) is not str:
+                arg = str(arg)
+            if has_magic(arg) is None:
+                append(arg)
+                continue
+            from glob import glob
+
             globbed = glob(arg, recursive=True)
             if globbed:
-                final_args.extend(globbed)
+                extend(globbed)
             else:
-                final_args.append(arg)
+                append(arg)
 
         for key, value in kwargs.items():
             key = key.replace("_", "-")
             if value is True:
                 if len(key) == 1:
-                    final_args.append(f"-{key}")
+                    append(f"-{key}")
                 else:
-                    final_args.append(f"--{key}")
+                    append(f"--{key}")
             elif value is False:
-                final_args.append(f"--no-{key}")
+                append(f"--no-{key}")
             elif len(key) == 1:
-                final_args.extend([f"-{key}", value])
+                extend([f"-{key}", value])
             else:
-                final_args.append(f"--{key}={value}")
+                append(f"--{key}={value}")
         return final_args
 
     # Lifetime implementation
@@ -338,24 +556,32 @@ class PipePy:
         self._feed_input()
         self.wait()
 
-    def _start_background_job(self, stdin_to_pipe=False):
+    def _start_background_job(self, stdin_to_pipe=False, stdout_file=None):
         """Starts the process that will carry out the command. If the process
         has already been started, it will abort. If the input to this
         command is another PipePy object, its background process will be
         started too via this method (so it will recursively start all
         background processes of a pipe chain if necessary) and its stdout
         will be connected to our stdin.
+
+        If `stdout_file` is set (to a file or `subprocess.DEVNULL`), the
+        process will write its output directly to it.
         """
 
         if self._process is not None and self._lazy:
             return
 
+        self._stdout_piped = False
+        stdin_file = None
         if isinstance(self._input, PipePy):
             if self._input._returncode is not None:
                 stdin = PIPE
             else:
                 self._input._start_background_job(stdin_to_pipe=stdin_to_pipe)
                 stdin = self._input._process.stdout
+        elif isinstance(self._input, _File) and not stdin_to_pipe:
+            # Like `<` in a shell, let the process read the file itself
+            stdin = stdin_file = open(self._input.filename, "rb")
         elif (
             isinstance(self._input, Iterable)
             or stdin_to_pipe
@@ -365,12 +591,11 @@ class PipePy:
         else:
             stdin = None
 
-        if self._stream_stdout is None and self._stream is None:
-            stdout = None if ALWAYS_STREAM else PIPE
-        elif self._stream_stdout is None and self._stream is not None:
-            stdout = None if self._stream else PIPE
+        if stdout_file is not None:
+            stdout = stdout_file
+            self._stdout_piped = True
         else:
-            stdout = None if self._stream_stdout else PIPE
+            stdout = None if self._streams_stdout() else PIPE
 
         if self._stream_stderr is None and self._stream is None:
             stderr = None if ALWAYS_STREAM else PIPE
@@ -379,11 +604,41 @@ class PipePy:
         else:
             stderr = None if self._stream_stderr else PIPE
 
-        self._process = Popen(
-            self._args, stdin=stdin, stdout=stdout, stderr=stderr, text=self._text
-        )
+        try:
+            self._process = _popen(
+                self._args,
+                stdin=stdin,
+                stdout=stdout,
+                stderr=stderr,
+                text=self._text,
+                bufsize=self._bufsize,
+            )
+        finally:
+            if stdin_file is not None:
+                stdin_file.close()
+        self._returncode = None
         _JOBS[self._process.pid] = self
 
+        if isinstance(self._input, PipePy) and stdin is self._input._process.stdout:
+            # The read end of the pipe has been inherited by our process.
+            # Closing our copy means the data never passes through Python and
+            # that the left command will get a SIGPIPE if we exit early
+            if stdin is not None:
+                stdin.close()
+            self._input._process.stdout = None
+            self._input._stdout_piped = True
+
+    def _streams_stdout(self):
+        """Whether the command's stdout is passed on to the stdout of the
+        Python process instead of being captured.
+        """
+
+        if self._stream_stdout is not None:
+            return self._stream_stdout
+        if self._stream is not None:
+            return self._stream
+        return ALWAYS_STREAM
+
     def _feed_input(self):
         """If the command has been configured to receive special input via its
         `_input` parameter, ie via pipes or input redirects, the input will
@@ -394,52 +649,79 @@ class PipePy:
             return
 
         left = self._input
-        if isinstance(left, PipePy):
-            if left._returncode is not None:
-                chunk = left.stdout
-                if self._text:
-                    try:
-                        chunk = chunk.decode(self._encoding)
-                    except AttributeError:
-                        pass
-                else:
-                    try:
-                        chunk = chunk.encode(self._encoding)
-                    except AttributeError:
-                        pass
-                self._process.stdin.write(chunk)
-                self._process.stdin.flush()
-                self._process.stdin.close()
-            else:
-                left._start_background_job()
-                left._feed_input()
+        if isinstance(left, PipePy) and left._returncode is None:
+            # Already started by `_start_background_job`, starting it again
+            # would spawn a second process for non-lazy commands
+            left._feed_input()
         elif isinstance(left, _File):
-            with open(
-                left.filename,
-                mode="r" if self._text else "rb",
-                encoding=self._encoding if self._text else None,
-            ) as f:
-                for line in f:
-                    self._process.stdin.write(line)
-                    self._process.stdin.flush()
-                self._process.stdin.close()
-        elif isinstance(left, Iterable):
-            if isinstance(left, (str, bytes)):
-                left = [left]
+            # The file has been passed to the process as its stdin by
+            # `_start_background_job`
+            pass
+        elif isinstance(left, (PipePy, Iterable)):
+            if isinstance(left, PipePy):
+                left = left.stdout
+            # Passed on explicitly, `wait` unsets `self._process.stdin` while
+            # the feeder thread may not have started yet
+            stdin = self._process.stdin
+            if isinstance(left, (str, bytes)) and len(left) <= _SMALL_INPUT_SIZE:
+                # Can't fill up the pipe, no need for a thread
+                self._write_input(left, stdin)
+            else:
+                # Write the input in the background, so that the process's
+                # output can be read at the same time. Otherwise, if the
+                # process filled up its stdout pipe before consuming all of
+                # its input, both sides would block forever
+                self._feeder = threading.Thread(
+                    target=self._write_input, args=(left, stdin, True), daemon=True
+                )
+                self._feeder.start()
+
+        self._input_consumed = True
+
+    def _write_input(self, left, stdin, in_background=False):
+        """Write `left`, a `str`, `bytes` or an iterable of them, to the
+        process's `stdin` and close it.
+        """
+
+        text, encoding = self._text, self._encoding
+        if isinstance(left, (str, bytes)):
+            # Convert large outputs of other commands one block at a time
+            # instead of all at once
+            if text and isinstance(left, bytes):
+                left = codecs.iterdecode(_iter_blocks(left), encoding)
+            elif not text and isinstance(left, str):
+                left = codecs.iterencode(_iter_blocks(left), encoding)
+            else:
+                left = (left,)
+        # Iterators (eg generators) may produce their items slowly, so pass
+        # each one on as soon as it arrives. Everything else is already in
+        # memory and can go through stdin's buffer, which is flushed when it
+        # fills up and when stdin is closed
+        flush = iter(left) is left
+        try:
             for chunk in left:
-                if self._text:
-                    try:
-                        chunk = chunk.decode(self._encoding)
-                    except AttributeError:
-                        pass
-                else:
-                    try:
-                        chunk = chunk.encode(self._encoding)
-                    except AttributeError:
-                        pass
-                self._process.stdin.write(chunk)
-                self._process.stdin.flush()
-            self._process.stdin.close()
+                # Type checks instead of try/except, since most chunks
+                # already have the right type and raising is expensive
+                if text and isinstance(chunk, (bytes, bytearray)):
+                    chunk = chunk.decode(encoding)
+                elif not text and isinstance(chunk, str):
+                    chunk = chunk.encode(encoding)
+                stdin.write(chunk)
+                if flush:
+                    stdin.flush()
+        except BrokenPipeError:
+            # The process exited without reading all of its input, eg `head`
+            pass
+        except Exception as exc:
+            if not in_background:
+                raise
+            # Will be raised by `wait`
+            self._feeder_error = exc
+        finally:
+            try:
+                stdin.close()
+            except BrokenPipeError:
+                pass
 
         self._input_consumed = True
 
@@ -468,6 +750,25 @@ class PipePy:
         result._feed_input()
         return result
 
+    def __await__(self):
+        """Evaluate the command in a worker thread, so that the event loop is
+        not blocked while waiting for it to finish:
+
+            >>> sleep = PipePy('sleep')
+            >>> async def main():
+            ...     await asyncio.gather(sleep(2), sleep(3))
+            >>> asyncio.run(main())  # Will take 3 seconds, not 5
+        """
+
+        def evaluate():
+            self._evaluate()
+            return self
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(None, evaluate).__await__()
+
     def wait(self, timeout=None):
         """Wait for a process to finish and store the result.
 
@@ -481,9 +782,21 @@ class PipePy:
             >>> print("Job finished")
         """
 
+        if self._returncode is not None:
+            # Already waited for, eg as part of a pipe
+            return
+
+        feeder = self._feeder
+        if feeder is not None:
+            # stdin is being written to by the feeder thread, which will close
+            # it when done. Keep `communicate` from touching it
+            self._process.stdin = None
+
         try:
             self._stdout, self._stderr = self._process.communicate(timeout=timeout)
-            self._returncode = self._process.wait()
+            if self._stdout_piped:
+                self._stdout = "" if self._text else b""
+            self._returncode = self._process.returncode
         except TimeoutExpired:
             raise
         except Exception:
@@ -496,10 +809,19 @@ class PipePy:
             else:
                 self._stderr = "" if self._text else b""
             self._returncode = self._process.wait(timeout)
-        try:
-            del _JOBS[self._process.pid]
-        except KeyError:
-            pass
+        _JOBS.pop(self._process.pid, None)
+
+        if feeder is not None:
+            feeder.join()
+            self._feeder = None
+            if self._feeder_error is not None:
+                error, self._feeder_error = self._feeder_error, None
+                if isinstance(error, AttributeError):
+                    # `wait` is called from properties like `stdout`, where
+                    # an `AttributeError` would make Python fall back to
+                    # `__getattr__` and hide the error
+                    raise RuntimeError(f"Failed to write input: {error}") from error
+                raise error
 
         job = self
         while isinstance(job._input, PipePy):
@@ -548,14 +870,30 @@ class PipePy:
         return self._stderr
 
     def __str__(self):
-        """Return stdout as string, even if the command has `_text=False`."""
+        """Return stdout as string, even if the command has `_text=False`.
 
+        The decoded string of lazy commands is kept for as long as the
+        captured output stays the same, so that it is not decoded again every
+        time. Non-lazy commands run again every time, so there is nothing to
+        reuse.
+        """
+
+        stdout = self.stdout
+        if isinstance(stdout, str):
+            return stdout
+        if (
+            self._lazy
+            and self._decoded_stdout is not None
+            and self._decoded_stdout[0] is stdout
+        ):
+            return self._decoded_stdout[1]
         try:
-            return self.stdout.decode(self._encoding)
+            result = stdout.decode(self._encoding)
         except UnicodeDecodeError:
-            return str(self.stdout)
-        except AttributeError:
-            return self.stdout
+            result = str(stdout)
+        if self._lazy:
+            self._decoded_stdout = (stdout, result)
+        return result
 
     def __bool__(self):
         """Use in boolean expressions.
@@ -567,9 +905,23 @@ class PipePy:
 
             >>> if git('branch') | grep('my_feature'):
             ...     print("Branch found")
+
+        Non-lazy commands are evaluated again whenever their output is
+        accessed, so their output is discarded here instead of captured,
+        unless it is streamed.
         """
 
-        return self.returncode == 0
+        if self._returncode is not None and self._lazy:
+            return self._returncode == 0
+        if not self._lazy and not self._streams_stdout():
+            self._start_background_job(stdout_file=DEVNULL)
+            self._feed_input()
+            self.wait()
+            # Nothing was captured, iterating etc must run the command again
+            self._stdout = None
+        else:
+            self._evaluate()
+        return self._returncode == 0
 
     def __iter__(self):
         """Support the iteration interface:
@@ -582,7 +934,7 @@ class PipePy:
         """
 
         if self._stdout is not None:
-            yield from self._stdout.splitlines()
+            yield from _iter_lines(self._stdout)
         else:
             self._start_background_job()
             self._feed_input()
@@ -600,8 +952,12 @@ class PipePy:
         ...  '15539', 'pts/5', '00:00:00', 'ps']
         """
 
-        for line in self:
-            yield from line.split()
+        if self._stdout is not None:
+            # Splitting the whole output at once gives the same words
+            yield from self._stdout.split()
+        else:
+            for line in self:
+                yield from line.split()
 
     def as_table(self):
         """Usage:
@@ -617,13 +973,8 @@ class PipePy:
         """
         lines = self.stdout.splitlines()
         fields = lines[0].split()
-        result = []
-        for line in lines[1:]:
-            item = {}
-            for i, value in enumerate(line.split(maxsplit=len(fields) - 1)):
-                item[fields[i]] = value
-            result.append(item)
-        return result
+        maxsplit = len(fields) - 1
+        return [dict(zip(fields, line.split(maxsplit=maxsplit))) for line in lines[1:]]
 
     def __repr__(self):
         """Return some useful information about the PipePy object.
@@ -645,21 +996,18 @@ class PipePy:
             return self._normal_repr()
 
     def _normal_repr(self):
-        result = [self.__class__.__name__, "("]
-        result.append(", ".join((repr(arg) for arg in self._args)))
-        if self._input is not None:
-            result.append(f", _input={self._input!r}")
-        if self._returncode is not None:
-            result.append(f", _returncode={self._returncode}")
-        if self._stdout:
-            result.append(f", _stdout={reprlib.repr(self._stdout)}")
-        if self._stderr:
-            result.append(f", _stderr={reprlib.repr(self._stderr)}")
-        result.append(")")
-        return "".join(result)
+        args = ", ".join(map(repr, self._args))
+        input_ = "" if self._input is None else f", _input={self._input!r}"
+        returncode = (
+            "" if self._returncode is None else f", _returncode={self._returncode}"
+        )
+        stdout = f", _stdout={reprlib.repr(self._stdout)}" if self._stdout else ""
+        stderr = f", _stderr={reprlib.repr(self._stderr)}" if self._stderr else ""
+        return f"{self.__class__.__name__}({args}{input_}{returncode}{stdout}{stderr})"
 
     def _interactive_repr(self):
-        return self.stdout + self.stderr
+        self._evaluate()
+        return self._stdout + self._stderr
 
     # Redirect output
     def __gt__(left, right):
@@ -672,16 +1020,7 @@ class PipePy:
         """
 
         if isinstance(right, (pathlib.Path, str)):
-            with open(
-                right,
-                "w" if left._text else "wb",
-                encoding=left._encoding if left._text else None,
-            ) as f:
-                if left._returncode is None:
-                    for line in left:
-                        f.write(line)
-                else:
-                    f.write(left.stdout)
+            left._write_to_file(right, append=False)
         elif isinstance(right, io.IOBase):
             right.seek(0)
             right.truncate()
@@ -703,16 +1042,7 @@ class PipePy:
         """
 
         if isinstance(right, (pathlib.Path, str)):
-            with open(
-                right,
-                "a" if left._text else "ab",
-                encoding=left._encoding if left._text else None,
-            ) as f:
-                if left._returncode is None:
-                    for line in left:
-                        f.write(line)
-                else:
-                    f.write(left.stdout)
+            left._write_to_file(right, append=True)
         elif isinstance(right, io.IOBase):
             right.read()  # Move pointer to end
             if left._returncode is None:
@@ -723,6 +1053,31 @@ class PipePy:
         else:
             return NotImplemented
 
+    def _write_to_file(self, filename, append):
+        """Implement `>` and `>>` for filenames. If the command hasn't been
+        started yet, the file will be used as the process's stdout, so that
+        the output is written by the process itself, like in a shell,
+        without passing through Python.
+        """
+
+        if self._returncode is None and (self._process is None or not self._lazy):
+            with open(filename, "ab" if append else "wb") as f:
+                self._start_background_job(stdout_file=f)
+                self._feed_input()
+                self.wait()
+            return
+
+        with open(
+            filename,
+            ("a" if append else "w") + ("" if self._text else "b"),
+            encoding=self._encoding if self._text else None,
+        ) as f:
+            if self._returncode is None:
+                for line in self:
+                    f.write(line)
+            else:
+                f.write(self.stdout)
+
     def __lt__(left, right):
         """Read input from file or file-like object
 
@@ -839,22 +1194,17 @@ class PipePy:
         """Implement the "pipe to function" functionality"""
 
         error = TypeError(f"Cannot pipe to {func!r}: " "Invalid function signature")
-        parameters = inspect.signature(func).parameters
-        if not parameters:
+        keys = _pipe_function_keys(func)
+        if keys is None:
             raise error
-        if not all(
-            (
-                value.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD
-                for value in parameters.values()
-            )
-        ):
-            raise error
-        keys = set(parameters.keys())
         if keys <= {"returncode", "output", "errors"}:
+            # Evaluate once; non-lazy commands would otherwise run again for
+            # each property
+            self._evaluate()
             arguments = {
-                "returncode": self.returncode,
-                "output": self.stdout,
-                "errors": self.stderr,
+                "returncode": self._returncode,
+                "output": self._stdout,
+                "errors": self._stderr,
             }
             kwargs = {key: value for key, value in arguments.items() if key in keys}
             return func(**kwargs)
@@ -930,12 +1280,154 @@ class PipePy:
             job = job._input
         job._process.stdin.close()
 
+        # Also waits for the rest of the pipe chain
         self.wait()
-        job = self
-        while isinstance(job._input, PipePy):
-            job = job._input
-            job.wait()
+
+    # Long-lived processes
+    def persistent(self):
+        """Return a `PersistentPipePy` for this command, which starts its
+        process once and reuses it for every line it is called with, instead
+        of starting a new process every time:
+
+            >>> sed = PipePy('stdbuf', '-oL', 'sed', 's/foo/bar/')
+            >>> replace = sed.persistent()
+            >>> [replace(line) for line in ("foo1", "foo2")]
+            <<< ['bar1', 'bar2']
+
+        The same object is returned for the same command, so calling this
+        inside a loop is fine. Only the command's arguments and its `_text`,
+        `_encoding` and `_bufsize` settings are used. Only the 16 most
+        recently used commands are kept running.
+        """
+
+        key = (tuple(self._args), self._text, self._encoding, self._bufsize)
+        evicted = None
+        with _PERSISTENT_LOCK:
+            try:
+                # Move to the end, as the most recently used
+                result = _PERSISTENT[key] = _PERSISTENT.pop(key)
+            except KeyError:
+                result = _PERSISTENT[key] = PersistentPipePy(
+                    self._args,
+                    text=self._text,
+                    encoding=self._encoding,
+                    bufsize=self._bufsize,
+                )
+                if len(_PERSISTENT) > _PERSISTENT_MAX_SIZE:
+                    evicted = _PERSISTENT.pop(next(iter(_PERSISTENT)))
+        if evicted is not None:
+            # Waits for calls in progress in other threads
+            evicted.close()
+        return result
 
     send_signal = _map_to_background_process("send_signal")
     terminate = _map_to_background_process("terminate")
     kill = _map_to_background_process("kill")
+
+
+class PersistentPipePy:
+    """A long-lived process that is sent one line of input per call and
+    replies with one line of output, so that the cost of starting it is only
+    paid once. Created with `PipePy.persistent()`.
+
+    The command must write exactly one line of output for every line of
+    input and must not buffer its output when it's not a terminal, or calls
+    will hang waiting for it. Many commands need to be told not to, eg
+    `sed -u`, `grep --line-buffered` or by running them with `stdbuf -oL`.
+
+    Calls from multiple threads are serialized. If the process exits, the
+    next call will start it again. All processes are closed when the Python
+    process exits.
+    """
+
+    def __init__(self, args, text=True, encoding="UTF-8", bufsize=None):
+        self._args = list(args)
+        self._text = text
+        self._encoding = encoding
+        self._bufsize = bufsize
+        self._lock = threading.Lock()
+        self._process = None
+        _PERSISTENT_ALL.add(self)
+
+    def _start(self):
+        self._close()
+        kwargs = {"text": True, "encoding": self._encoding} if self._text else {}
+        self._process = _popen(
+            self._args, stdin=PIPE, stdout=PIPE, bufsize=self._bufsize, **kwargs
+        )
+
+    def close(self, timeout=1):
+        """Send an EOF to the process and wait for it to exit. If it doesn't
+        exit within `timeout` seconds, kill it.
+        """
+
+        with self._lock:
+            self._close(timeout)
+
+    def _close(self, timeout=1):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._process.stdout.close()
+            try:
+                self._process.wait(timeout)
+            except TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+
+    def __call__(self, line):
+        """Send `line` to the process and return the line it replies with,
+        both without a trailing newline.
+        """
+
+        newline = "\n" if self._text else b"\n"
+        if self._text and isinstance(line, bytes):
+            line = line.decode(self._encoding)
+        elif not self._text and isinstance(line, str):
+            line = line.encode(self._encoding)
+        if newline in line:
+            raise ValueError("Only a single line can be sent at a time")
+
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            process = self._process
+            try:
+                try:
+                    process.stdin.write(line + newline)
+                    process.stdin.flush()
+                except BrokenPipeError:
+                    pass
+                reply = process.stdout.readline()
+            except BaseException:
+                # The reply, if not read yet, would be returned by the next
+                # call instead, so start over
+                process.kill()
+                self._close()
+                raise
+            if not reply.endswith(newline):
+                # The process exited before replying
+                self._close()
+                raise PipePyError(process.returncode, reply, None)
+        return reply[:-1]
+
+    def __repr__(self):
+        return f"PersistentPipePy({' '.join(self._args)!r})"
+
+
+@atexit.register
+def _close_persistent():
+    for persistent in list(_PERSISTENT_ALL):
+        if persistent._lock.acquire(timeout=1):
+            try:
+                persistent._close()
+            finally:
+                persistent._lock.release()
+        else:
+            # A call in another thread is stuck waiting for a reply
+            process = persistent._process
+            if process is not None:
+                process.kill()
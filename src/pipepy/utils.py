@@ -5,3 +5,17 @@ class _File:
 
     def __init__(self, filename):
         self.filename = filename
+
+
+def _iter_lines(output):
+    """Iterate over the lines of captured `str` or `bytes` output, keeping
+    their line endings, like iterating over the process's stdout would,
+    without building a list of all of them first.
+    """
+
+    newline = "\n" if isinstance(output, str) else b"\n"
+    start, length = 0, len(output)
+    while start < length:
+        end = output.find(newline, start) + 1 or length
+        yield output[start:end]
+        start = end
@@ -1,8 +1,11 @@
+import asyncio
+import threading
 import time
 
 import pytest
 
-from pipepy import PipePy, TimeoutExpired, sleep
+from pipepy import PipePy, PipePyError, TimeoutExpired, cat, false, sleep
+from pipepy.pipepy import _PERSISTENT, _PERSISTENT_MAX_SIZE
 
 echo_messages = PipePy("python", "src/tests/playground/echo_messages.py")
 
@@ -41,3 +44,91 @@ def test_wait_timeout():
     with pytest.raises(TimeoutExpired):
         command.wait(0.01)
     command.wait()
+
+
+def test_await():
+    async def main():
+        return await asyncio.gather(sleep(0.2), sleep(0.2), false)
+
+    tic = time.time()
+    first, second, third = asyncio.run(main())
+    assert time.time() - tic < 0.35
+    assert first and second
+    assert not third
+
+
+def test_persistent():
+    replace = PipePy("sed", "-u", "s/foo/bar/").persistent()
+    assert replace is PipePy("sed", "-u", "s/foo/bar/").persistent()
+    assert [replace(f"foo{i}") for i in range(3)] == ["bar0", "bar1", "bar2"]
+    pid = replace._process.pid
+    assert replace("foo") == "bar"
+    assert replace._process.pid == pid
+    with pytest.raises(ValueError):
+        replace("foo\nfoo")
+
+    assert cat(_text=False).persistent()("foo") == b"foo"
+
+    # Restarted if it exits
+    replace._process.kill()
+    replace._process.wait()
+    assert replace("foo") == "bar"
+    assert replace._process.pid != pid
+
+    silent = PipePy("python", "-c", "input()").persistent()
+    with pytest.raises(PipePyError):
+        silent("foo")
+
+
+def test_persistent_cleanup():
+    # A bad reply leaves nothing behind for the next call to read
+    reply = PipePy(
+        "python",
+        "-uc",
+        "import sys\n"
+        "for line in sys.stdin:\n"
+        "    reply = b'\\xff\\n' if line == 'bad\\n' else line.encode()\n"
+        "    sys.stdout.buffer.write(reply)",
+    ).persistent()
+    with pytest.raises(UnicodeDecodeError):
+        reply("bad")
+    assert reply._process is None
+    assert reply("good") == "good"
+
+    # Processes that ignore EOF are killed
+    stubborn = PipePy(
+        "python", "-uc", "import time\nprint(input())\nwhile True: time.sleep(1)"
+    ).persistent()
+    assert stubborn("foo") == "foo"
+    process = stubborn._process
+    tic = time.time()
+    stubborn.close(timeout=0.1)
+    assert time.time() - tic < 1
+    assert process.returncode is not None
+
+    # Only the most recently used commands are kept running
+    commands = [PipePy("sed", "-u", f"s/{i}/x/").persistent() for i in range(20)]
+    assert len(_PERSISTENT) == _PERSISTENT_MAX_SIZE
+    assert commands[-1] in _PERSISTENT.values()
+    assert commands[0] not in _PERSISTENT.values()
+
+
+def test_persistent_threads():
+    replace = PipePy("sed", "-u", "s/foo/bar/").persistent()
+    errors = []
+
+    def call(i):
+        try:
+            for j in range(20):
+                assert replace(f"foo{i}{j}") == f"bar{i}{j}"
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(20):
+        replace.close()
+    for thread in threads:
+        thread.join()
+    assert errors == []
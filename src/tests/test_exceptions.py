@@ -23,3 +23,17 @@ def test_exceptions():
     result = false(_raise=False)()
 
     pipepy.set_always_raise(False)
+
+
+def test_exception_attributes():
+    import pickle
+
+    with pytest.raises(PipePyError) as exc_info:
+        false(_raise=True)()
+    assert exc_info.value.returncode == 1
+    assert exc_info.value.stdout == ""
+    assert exc_info.value.stderr == ""
+
+    exc = pickle.loads(pickle.dumps(PipePyError(2, "out", "err")))
+    assert (exc.returncode, exc.stdout, exc.stderr) == (2, "out", "err")
+    assert exc.args == (2, "out", "err")
@@ -1,8 +1,23 @@
+import json
 import os
+import signal
+import subprocess
+import time
+from unittest import mock
 
 import pytest
 
-from pipepy import PipePyError, cd, export, jobs, sleep, source, wait_jobs
+from pipepy import (
+    PipePy,
+    PipePyError,
+    cd,
+    export,
+    jobs,
+    run_parallel,
+    sleep,
+    source,
+    wait_jobs,
+)
 
 
 def pwd():
@@ -109,3 +124,271 @@ def test_source():
         with source("env"):
             export(FOO___="FOO")
         assert os.environ["FOO___"] == "FOO"
+
+
+def test_source_reuses_shell():
+    from pipepy.misc import _get_shell_coprocess
+
+    os.environ.pop("FOO___", None)
+    with cd("src/tests/playground"):
+        coprocess = _get_shell_coprocess("bash")
+        with source("env"):
+            pass
+        pid = coprocess._process.pid
+        with source("env"):
+            assert os.environ["FOO___"] == "foo"
+        assert coprocess._process.pid == pid
+
+        # Environment changes restart the shell
+        with export(DUMMY_ENV_VAR_____="FOO"), source("env"):
+            pass
+        assert coprocess._process.pid != pid
+
+        with pytest.raises(PipePyError) as exc_info:
+            source("bad_env", quiet=False)
+        assert exc_info.value.returncode == 1
+
+
+def test_source_interrupted(tmp_path):
+    from pipepy.misc import _get_shell_coprocess
+
+    coprocess = _get_shell_coprocess("bash")
+    bad_env = tmp_path / "bad_env"
+    bad_env.write_text(f"echo '{coprocess._sentinel} foo'\n")
+    with pytest.raises(ValueError):
+        source(str(bad_env), quiet=False)
+    assert coprocess._process is None
+
+    os.environ.pop("FOO___", None)
+    with cd("src/tests/playground"), source("env"):
+        assert os.environ["FOO___"] == "foo"
+
+
+def test_source_cache(tmp_path):
+    os.environ.pop("FOO___", None)
+    with cd("src/tests/playground"), export(XDG_CACHE_HOME=str(tmp_path)):
+        with source("env", cache=True):
+            assert os.environ["FOO___"] == "foo"
+        assert "FOO___" not in os.environ
+        (cache_filename,) = (tmp_path / "pipepy" / "source").iterdir()
+
+        # Use a cached value that the shell would not produce
+        cache_filename.write_text('{"FOO___": "cached"}')
+        with source("env", cache=True):
+            assert os.environ["FOO___"] == "cached"
+        with source("env"):
+            assert os.environ["FOO___"] == "foo"
+
+        # Malformed cache files are ignored
+        for cached in ('["FOO___"]', '{"FOO___": 1}', "null"):
+            cache_filename.write_text(cached)
+            with source("env", cache=True):
+                assert os.environ["FOO___"] == "foo"
+
+        # Different environment, different cache entry
+        with export(DUMMY_ENV_VAR_____="FOO"), source("env", cache=True):
+            assert os.environ["FOO___"] == "foo"
+        assert len(list((tmp_path / "pipepy" / "source").iterdir())) == 2
+
+        # Failures are not cached
+        source("bad_env", cache=True)
+        assert len(list((tmp_path / "pipepy" / "source").iterdir())) == 2
+
+
+def test_no_path_scan():
+    from pipepy import python
+
+    code = (
+        "import pipepy; "
+        "from pipepy import true; "
+        "assert not pipepy.misc._AVAILABLE; "
+        "assert true()"
+    )
+    with export(PIPEPY_NO_PATH_SCAN="1"):
+        assert python("-c", code)
+
+
+def test_command_cache(tmp_path):
+    from pipepy import misc, python
+
+    code = "import pipepy; print(pipepy.misc._AVAILABLE.get('fake_command_____'))"
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "true").symlink_to(misc._PATHS["true"])
+    path = f"{bin_dir}:{os.environ['PATH']}"
+    cache_filename = tmp_path / "pipepy" / "commands.json"
+
+    with export(XDG_CACHE_HOME=str(tmp_path)):
+        with export(PATH=path):
+            assert str(python("-c", code)) == "None\n"
+        cache = json.loads(cache_filename.read_text())
+        assert cache[str(bin_dir)][1] == ["true"]
+
+        # The cached listing is used as long as the directory is unchanged
+        cache[str(bin_dir)][1].append("fake-command_____")
+        cache_filename.write_text(json.dumps(cache))
+        with export(PATH=path):
+            assert str(python("-c", code)) == "fake-command_____\n"
+        with export(PATH=path, PIPEPY_NO_COMMAND_CACHE="1"):
+            assert str(python("-c", code)) == "None\n"
+
+        # Changes in the directory invalidate the cache
+        (bin_dir / "false").symlink_to(misc._PATHS["false"])
+        with export(PATH=path):
+            assert str(python("-c", code)) == "None\n"
+        cache = json.loads(cache_filename.read_text())
+        assert sorted(cache[str(bin_dir)][1]) == ["false", "true"]
+
+        # Files made executable later are found, even if the cache misses them
+        script = bin_dir / "pipepy-fake-command"
+        script.write_text("#!/bin/sh\necho fake\n")
+        with export(PATH=path):
+            python("-c", code)()
+        script.chmod(0o755)
+        fake_code = "import pipepy; print(pipepy.pipepy_fake_command(), end='')"
+        with export(PATH=path):
+            assert str(python("-c", fake_code)) == "fake\n"
+
+        # Malformed entries are ignored
+        for entry in (5, [1], ["1", []], [1, 2], [1, [2]]):
+            cache_filename.write_text(json.dumps({str(bin_dir): entry}))
+            with export(PATH=path):
+                assert str(python("-c", code)) == "None\n"
+
+
+def test_run_parallel():
+    start = time.time()
+    first, second = run_parallel(sleep(0.2), sleep(0.2))
+    assert time.time() - start < 0.35
+    assert first.returncode == second.returncode == 0
+
+    assert run_parallel(lambda: 1, lambda: 2) == [1, 2]
+    assert run_parallel() == []
+
+    def fail():
+        raise ValueError("foo")
+
+    with pytest.raises(ValueError):
+        run_parallel(sleep(0.01), fail)
+
+
+def test_lazy_commands():
+    import pipepy
+    from pipepy import misc
+
+    misc.__dict__.pop("true", None)
+    assert "true" in dir(pipepy)
+    assert "true" not in vars(misc)
+
+    true = pipepy.true
+    assert isinstance(true, pipepy.PipePy)
+    assert misc.true is true
+    assert true()
+
+    with pytest.raises(AttributeError):
+        pipepy.this_command_does_not_exist_____
+
+
+def test_resolved_executables():
+    from pipepy import pipepy
+
+    assert pipepy._EXECUTABLES["true"].endswith("/true")
+
+    # A stale path falls back to searching PATH
+    pipepy._EXECUTABLES["true"] = "/this/does/not/exist"
+    from pipepy import true
+
+    assert true()
+    assert "true" not in pipepy._EXECUTABLES
+    assert pipepy._find_executable("true").endswith("/true")
+
+    # Lookups are cached until PATH changes
+    assert pipepy._find_executable("this_does_not_exist_____") is None
+    assert "this_does_not_exist_____" in pipepy._EXECUTABLES
+    with export(PATH=os.environ["PATH"] + ":foo"):
+        assert pipepy._find_executable("sleep").endswith("/sleep")
+        assert "this_does_not_exist_____" not in pipepy._EXECUTABLES
+        assert sleep(0.01)()
+
+
+@pytest.mark.skipif(
+    not getattr(subprocess, "_USE_POSIX_SPAWN", False),
+    reason="posix_spawn is not used by subprocess on this platform",
+)
+def test_posix_spawn():
+    from pipepy import true
+
+    with mock.patch.object(
+        subprocess.Popen,
+        "_posix_spawn",
+        autospec=True,
+        side_effect=subprocess.Popen._posix_spawn,
+    ) as posix_spawn:
+        assert true()
+    assert posix_spawn.called
+
+
+def test_close_fds_without_posix_spawn():
+    from pipepy import true
+
+    with mock.patch("pipepy.pipepy._USE_POSIX_SPAWN", False), mock.patch(
+        "pipepy.pipepy.Popen", wraps=subprocess.Popen
+    ) as popen:
+        assert true()
+    ((_, kwargs),) = popen.call_args_list
+    assert "close_fds" not in kwargs
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="Requires procfs")
+def test_sigpipe_is_not_ignored():
+    from pipepy import cat
+
+    (sig_ign,) = [
+        line.split()[1] for line in cat("/proc/self/status") if "SigIgn" in line
+    ]
+    assert not int(sig_ign, 16) & (1 << (signal.SIGPIPE - 1))
+
+
+def test_bufsize():
+    from pipepy import cat, echo
+    from pipepy.pipepy import _PIPE_BUFFER_SIZE
+
+    with mock.patch("pipepy.pipepy.Popen", wraps=subprocess.Popen) as popen:
+        assert str(echo("hello")) == "hello\n"
+        assert str(echo("hello", _bufsize=1024).foo) == "hello foo\n"
+        assert str(echo("hello")(_bufsize=-1) | cat) == "hello\n"
+    # `call.kwargs` is not available before Python 3.8
+    bufsizes = [kwargs["bufsize"] for _, kwargs in popen.call_args_list]
+    assert bufsizes == [_PIPE_BUFFER_SIZE, 1024, -1, _PIPE_BUFFER_SIZE]
+
+
+def test_import_defers_slow_modules():
+    from pipepy import python
+
+    modules = ["asyncio", "concurrent.futures", "glob", "hashlib", "inspect"]
+    modules += ["logging", "tempfile", "uuid"]
+    output = python(
+        "-c",
+        f"import sys, pipepy; print(sorted({set(modules)!r} & set(sys.modules)))",
+    )
+    assert str(output) == "[]\n"
+
+
+def test_star_import():
+    namespace = {}
+    exec("from pipepy import *", namespace)
+    assert str(namespace["echo"]("hello")) == "hello\n"
+    assert namespace["grep"] is not None
+    assert namespace["cd"] is cd
+    assert "os" not in namespace
+
+
+def test_imports_dont_shadow_commands():
+    from pipepy import misc
+
+    for name in ("atexit", "hashlib", "json", "shlex", "tempfile", "threading"):
+        value = vars(misc).get(name)
+        assert value is None or isinstance(value, PipePy)
+    for name in ("uuid", "Popen", "PIPE", "DEVNULL"):
+        value = vars(misc).get(name)
+        assert value is None or isinstance(value, PipePy)
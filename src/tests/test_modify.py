@@ -1,3 +1,7 @@
+from unittest import mock
+
+import pytest
+
 from pipepy import PipePy, git, ls
 
 
@@ -15,6 +19,19 @@ def test_glob():
     )
 
 
+def test_no_glob_without_wildcards():
+    with mock.patch("glob.glob") as glob:
+        assert PipePy("ls", "-l", "src/tests/playground")._args == [
+            "ls",
+            "-l",
+            "src/tests/playground",
+        ]
+    glob.assert_not_called()
+    assert PipePy("src/tests/playground/nomatch*")._args == [
+        "src/tests/playground/nomatch*"
+    ]
+
+
 def test_kwargs():
     assert PipePy(key="value")._args == ["--key=value"]
     assert PipePy(key=2)._args == ["--key=2"]
@@ -44,3 +61,29 @@ def test_modifiers():
 
     job = ls(_raise=False)
     assert not job._raise
+
+
+def test_args_are_converted_once():
+    command = PipePy("echo", "src/tests/playground/globtest*")
+    assert command("[x]")._args == command._args + ["[x]"]
+    assert command.foo._args == command._args + ["foo"]
+
+    # An already-globbed argument must not be globbed again
+    escaped = PipePy("echo", "src/tests/playground/[g]lobtest1")
+    assert escaped._args == ["echo", "src/tests/playground/globtest1"]
+    with mock.patch("glob.glob") as glob:
+        escaped("-n")
+        escaped.foo
+    glob.assert_not_called()
+
+
+def test_slots():
+    command = git.status
+    assert command._args == ["git", "status"]
+    with pytest.raises(AttributeError):
+        command.foo = "bar"
+
+
+def test_derived_commands_share_iterator_input():
+    command = (line for line in ["a\n", "b\n"]) | PipePy("grep")
+    assert str(command.a) == "a\n"
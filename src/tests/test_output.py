@@ -3,7 +3,7 @@ import pathlib
 import time
 
 import pipepy
-from pipepy import PipePy, cat, echo, false, grep, ls, rm, true
+from pipepy import PipePy, cat, echo, false, grep, ls, rm, set_always_stream, true
 
 echo_messages = PipePy("python", "src/tests/playground/echo_messages.py")
 
@@ -22,6 +22,30 @@ def test_bool():
     assert true
     assert not false
 
+    command = PipePy("echo", "hello world")
+    assert command
+    assert command._stdout is None
+    assert command.stdout == "hello world\n"
+    assert command
+    assert list(command) == ["hello world\n"]
+    assert command
+    assert list(command.iter_words()) == ["hello", "world"]
+    lazy = command()
+    assert lazy
+    assert lazy._stdout == "hello world\n"
+
+
+def test_bool_streamed(capfd):
+    assert PipePy("echo", "hello world", _stream_stdout=True)
+    assert capfd.readouterr().out == "hello world\n"
+
+    set_always_stream(True)
+    try:
+        assert PipePy("echo", "hello world")
+    finally:
+        set_always_stream(False)
+    assert capfd.readouterr().out == "hello world\n"
+
 
 def test_str():
     assert str(echo("hello world")) == "hello world\n"
@@ -31,6 +55,13 @@ def test_str():
         == "καλημέρα"
     )
 
+    command = echo("καλημέρα", _text=False)
+    assert str(command) is str(command)
+
+    command = PipePy("echo", "καλημέρα", _text=False)
+    assert str(command) == "καλημέρα\n"
+    assert command._decoded_stdout is None
+
 
 def test_as_table():
     (
@@ -45,6 +76,16 @@ def test_as_table():
 def test_iter():
     assert list(echo("a\nb\nc")) == ["a\n", "b\n", "c\n"]
     assert list(echo("a", "b", "c").iter_words()) == ["a", "b", "c"]
+    command = echo("a b\n c\n\nd")
+    command._evaluate()
+    assert list(command.iter_words()) == ["a", "b", "c", "d"]
+
+    command = echo("a\nb\nc")
+    command._evaluate()
+    assert list(command) == ["a\n", "b\n", "c\n"]
+    command = echo("-n", "a\nb", _text=False)
+    command._evaluate()
+    assert list(command) == [b"a\n", b"b"]
 
     tic = None
     delay = 0.01
@@ -89,6 +130,37 @@ def test_redirects_pathlib():
     rm(filename)()
 
 
+def test_redirects_are_written_by_the_process(tmp_path):
+    filename = tmp_path / "output.txt"
+    result = echo("hello world")
+    result > filename
+    assert result._process.stdout is None
+    assert result._stdout == ""
+    assert filename.read_text() == "hello world\n"
+
+    ("aaa\nbbb\n" | grep("bbb")) >> filename
+    assert filename.read_text() == "hello world\nbbb\n"
+
+    # Non-lazy commands capture their output again when re-evaluated
+    echo > filename
+    assert filename.read_text() == "\n"
+    assert str(echo) == "\n"
+
+
+def test_redirects_binary_input(tmp_path):
+    filename = tmp_path / "input.bin"
+    data = bytes(range(256)) * 64 + b"\r\n"
+    filename.write_bytes(data)
+    assert (cat(_text=False) < filename).stdout == data
+
+    # The process reads the file itself, so the input can be larger than a
+    # pipe's buffer
+    data = b"hello world\n" * 100000
+    filename.write_bytes(data)
+    assert (cat(_text=False) < filename).stdout == data
+    assert (cat < filename).stdout == data.decode()
+
+
 def test_redirects_buffers():
     buf = io.StringIO("foo")
     echo("hello world") > buf
@@ -132,3 +204,10 @@ def test_streams():
     assert not result._stderr
 
     pipepy.set_always_stream(False)
+
+
+def test_repr():
+    assert repr(PipePy("ls", "-l")) == "PipePy('ls', '-l')"
+    command = echo("hello")
+    command._evaluate()
+    assert repr(command) == "PipePy('echo', 'hello', _returncode=0, _stdout='hello\\n')"
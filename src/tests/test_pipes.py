@@ -1,4 +1,12 @@
-from pipepy import cat, echo, grep
+import gc
+import time
+import weakref
+from unittest import mock
+
+import pytest
+
+from pipepy import PipePy, cat, echo, grep
+from pipepy.pipepy import _PIPE_FUNCTION_KEYS, _pipe_function_keys
 
 
 def test_pipe_command_to_command():
@@ -51,3 +59,107 @@ def upperize():
 def test_pipe_to_generator():
     assert list(echo("aaa\nbbb") | upperize()) == ["AAA\n", "BBB\n"]
     assert str(echo("aaa\nbbb") | upperize() | grep("AAA")) == "AAA\n"
+
+
+def test_pipe_left_command_stops_when_right_exits():
+    from pipepy import head, yes
+
+    result = yes | head("-1")
+    assert str(result) == "y\n"
+    assert result._input._returncode != 0  # Killed by SIGPIPE
+    assert result._input._stdout == ""
+
+
+def test_pipe_chain():
+    assert str(echo("aaa\nbbb") | grep("b") | grep("bbb")) == "bbb\n"
+
+
+def test_pipe_to_function_signature_is_cached():
+    def upper(output):
+        return output.upper()
+
+    assert (echo("a") | upper) == "A\n"
+    assert _PIPE_FUNCTION_KEYS[upper] == {"output"}
+    with mock.patch("inspect.signature") as signature:
+        assert (echo("b") | upper) == "B\n"
+    signature.assert_not_called()
+
+    # The cache doesn't keep functions alive
+    reference = weakref.ref(upper)
+    del upper
+    gc.collect()
+    assert reference() is None
+
+    # Builtins can't be weakly referenced, they are not cached
+    assert _pipe_function_keys(len) is None
+    assert _pipe_function_keys(len) is None
+
+
+def test_pipe_non_lazy_command_to_function_runs_it_once(tmp_path):
+    counter = tmp_path / "counter"
+    command = PipePy("sh", "-c", f"echo run >> {counter}; echo out; echo err >&2")
+
+    def collect(returncode, output, errors):
+        return returncode, output, errors
+
+    assert (command | collect) == (0, "out\n", "err\n")
+    assert counter.read_text() == "run\n"
+
+
+def test_pipe_evaluated_command_with_different_text_mode(monkeypatch):
+    # Make sure multi-byte characters get split between blocks
+    monkeypatch.setattr("pipepy.pipepy._PIPE_BUFFER_SIZE", 3)
+
+    left = echo("καλημέρα", _text=False)()
+    assert str(left | cat) == "καλημέρα\n"
+    left = echo("καλημέρα")()
+    assert (left | cat(_text=False)).stdout == "καλημέρα\n".encode()
+
+
+def test_pipe_mixed_iterable_to_command():
+    assert str(["a\n", b"b\n", bytearray(b"c\n")] | cat) == "a\nb\nc\n"
+    assert (["a\n", b"b\n"] | cat(_text=False)).stdout == b"a\nb\n"
+
+
+def test_pipe_large_input_to_command():
+    from pipepy import head
+
+    # Larger than a pipe's buffer in both directions
+    lines = [f"line {i}\n" for i in range(100000)]
+    assert str(lines | cat) == "".join(lines)
+    assert str("".join(lines) | cat) == "".join(lines)
+    assert str((line for line in lines) | cat | cat) == "".join(lines)
+    assert str("".join(lines) | cat | cat(_text=False)) == "".join(lines)
+
+    # The command exits before consuming all of its input
+    assert str(lines | head("-1")) == "line 0\n"
+
+
+def test_pipe_input_error():
+    def generator():
+        yield "foo\n"
+        raise ValueError("bar")
+
+    with pytest.raises(ValueError, match="bar"):
+        (generator() | cat)()
+
+
+def test_pipe_input_feeder_starts_late():
+    write_input = PipePy._write_input
+
+    def slow_write_input(*args, **kwargs):
+        time.sleep(0.05)
+        return write_input(*args, **kwargs)
+
+    lines = ["x" * 2000 + "\n"]
+    with mock.patch.object(PipePy, "_write_input", slow_write_input):
+        assert (lines | cat).stdout == lines[0]
+
+
+def test_pipe_input_attribute_error():
+    def generator():
+        yield "foo\n"
+        raise AttributeError("bar")
+
+    with pytest.raises(RuntimeError, match="bar"):
+        (generator() | cat).stdout